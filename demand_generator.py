@@ -1,19 +1,37 @@
+import multiprocessing
+import multiprocessing.queues
+import multiprocessing.synchronize
 import random
+import signal
+import sys
 import threading
 import time
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
 from datetime import datetime
-from typing import Optional
+from itertools import accumulate, repeat
+from typing import TypeVar
 
 import yaml
 
 from geographic.zone_manager import StopRegistry
-from models.trip_request import TripRequest
+from models.trip_request import TripRequest, format_trip_json
 from patterns.temporal_engine import TemporalPatternEngine
 
+TRIP_PURPOSES = ("work", "shopping", "leisure", "medical", "education")
+
+_T = TypeVar("_T")
+
+# Trip fields in TripRequest order, with the timestamp already in ISO format
+TripRow = tuple[str, str, str, str, int, str, int]
+
 
 class DemandGenerator:
-    def __init__(self, config_path: str):
+    def __init__(self, config_path: str, workers: int = 1):
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers}")
         # Load configuration
+        self.config_path = config_path
         with open(config_path) as f:
             self.config = yaml.safe_load(f)
         # Initialize components
@@ -25,86 +43,297 @@ class DemandGenerator:
         )  # Default to 10 requests per minute
         self.output_format = self.config["streaming"]["output_format"]
         self.burst_enabled = self.config["streaming"].get("burst_enabled", True)
-        # Threading control
+        # Private random source with pre-bound methods for the per-tick hot path
+        self._rng = random.Random()
+        self._random = self._rng.random
+        self._choices = self._rng.choices
+        # Sequence numbers appended to trip ids; worker shards interleave them
+        self._next_trip_number = 1
+        self._trip_number_step = 1
+        # Position of this generator among the worker shards sharing the demand
+        self._shard_index = 0
+        self._shard_count = 1
+        # Output lines buffered until the end of the current tick
+        self._pending: list[str] = []
+        self._write_output: Callable[[str], None] = self._write_stdout
+        # Fold zone and stop selection into a single weighted draw over all stops
+        self._zone_ids = [zone["id"] for zone in self.config["geographic"]["default_zones"]]
+        self._refresh_stop_table()
+        # Threading control; the event wakes sleeping threads on shutdown
         self.running = False
-        self.thread: Optional[threading.Thread] = None
+        self.thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+        # Worker processes, each generating 1/workers of the demand
+        self.workers = workers
+        self._processes: list[multiprocessing.Process] = []
+        self._output_queue: multiprocessing.queues.Queue[str | None] | None = None
+        self._workers_stop: multiprocessing.synchronize.Event | None = None
+        # Coarse clock: current time and its id stamp, refreshed by an upkeep thread
+        self._clock: tuple[datetime, str] = self._read_clock()
+        self._clock_thread: threading.Thread | None = None
 
     def start_streaming(self) -> None:
         """Start the demand generation streaming process"""
         if self.running:
             return
         self.running = True
-        self.thread = threading.Thread(target=self._streaming_loop)
+        self._stop_event.clear()
+        if self.workers > 1:
+            self._start_workers()
+            return
+        self._clock = self._read_clock()
+        self._clock_thread = threading.Thread(target=self._clock_upkeep, daemon=True)
+        self._clock_thread.start()
+        self.thread = threading.Thread(target=self._streaming_loop, daemon=True)
         self.thread.start()
 
     def stop_streaming(self) -> None:
         """Clean shutdown of streaming process"""
         self.running = False
+        self._stop_event.set()
+        if self._processes:
+            self._stop_workers()
         if self.thread:
             self.thread.join()
+        if self._clock_thread:
+            self._clock_thread.join()
+
+    def _start_workers(self) -> None:
+        """Start worker processes and a thread collecting their output"""
+        output_queue: multiprocessing.queues.Queue[str | None] = multiprocessing.Queue()
+        self._output_queue = output_queue
+        self._workers_stop = multiprocessing.Event()
+        self._processes = [
+            multiprocessing.Process(
+                target=_run_worker,
+                args=(self.config_path, index, self.workers, output_queue, self._workers_stop),
+                daemon=True,
+            )
+            for index in range(self.workers)
+        ]
+        for process in self._processes:
+            process.start()
+        self.thread = threading.Thread(
+            target=self._collect_output, args=(output_queue,), daemon=True
+        )
+        self.thread.start()
+
+    def _stop_workers(self) -> None:
+        """Stop worker processes, then let the collector drain their output"""
+        if self._workers_stop:
+            self._workers_stop.set()
+        for process in self._processes:
+            process.join()
+        self._processes = []
+        if self._output_queue:
+            self._output_queue.put(None)
+
+    def _collect_output(self, output_queue: multiprocessing.queues.Queue[str | None]) -> None:
+        """Write output chunks from worker processes until told to stop"""
+        while (chunk := output_queue.get()) is not None:
+            self._write_stdout(chunk)
+
+    @staticmethod
+    def _read_clock() -> tuple[datetime, str]:
+        """Read the current time together with its trip id stamp"""
+        now = datetime.now()
+        return now, now.strftime("%Y%m%d_%H%M%S")
+
+    def _clock_upkeep(self) -> None:
+        """Refresh the coarse clock so the streaming loop never reads the time itself"""
+        while not self._stop_event.wait(0.5):
+            # Swap the whole tuple so readers never see a mismatched pair
+            self._clock = self._read_clock()
 
     def _streaming_loop(self) -> None:
         """Main streaming loop - generates trip requests based on temporal patterns"""
-        while self.running:
-            current_time = datetime.now()
+        # Schedule ticks against a monotonic deadline so time spent generating
+        # doesn't accumulate as drift
+        next_tick = time.monotonic()
+        while not self._stop_event.is_set():
+            current_time, stamp = self._clock
             # Get current demand rate multiplier
             demand_multiplier = self.temporal_engine.calculate_demand_rate(current_time)
             current_rate = self.base_rate * demand_multiplier
             # Generate trip requests for this time period
             num_requests = self._calculate_requests_count(current_rate)
-            for _ in range(num_requests):
-                trip_request = self._generate_trip_request(current_time)
-                self._send_to_output_stream(trip_request)
-            # Sleep until next generation cycle
-            time.sleep(1.0)  # Generate every second
+            self._pending.extend(self._render_batch(current_time, num_requests, stamp))
+            self._flush_output()
+            # Sleep until next generation cycle, one tick per second
+            next_tick += 1.0
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                self._stop_event.wait(delay)
+            elif delay < -1.0:
+                # More than a tick behind: resynchronise instead of bursting to catch up
+                next_tick = time.monotonic()
 
     def _calculate_requests_count(self, rate: float) -> int:
         """Calculate number of requests to generate based on current rate"""
+        if not self.burst_enabled:
+            # Shard i takes floor((n + i) / N), so the shards' counts sum to exactly n
+            return (int(rate) + self._shard_index) // self._shard_count
+        rate /= self._shard_count
         base_count = int(rate)
-        # Add randomness for burst patterns if enabled
-        if self.burst_enabled:
-            # Use Poisson-like distribution for realistic arrival patterns
-            remainder = rate - base_count
-            if random.random() < remainder:
-                base_count += 1
+        # Use Poisson-like distribution for realistic arrival patterns
+        remainder = rate - base_count
+        if self._random() < remainder:
+            base_count += 1
         return base_count
 
     def _generate_trip_request(self, timestamp: datetime) -> TripRequest:
         """Generate a single trip request"""
-        # Select random origin and destination zones
-        zones = self.config["geographic"]["default_zones"]
-        origin_zone = random.choice(zones)["id"]
-        destination_zone = random.choice(zones)["id"]
-        # Get random stops from selected zones
-        origin_stops = self.stop_registry.get_stops_in_zone(origin_zone)
-        destination_stops = self.stop_registry.get_stops_in_zone(destination_zone)
-        # Fallback to any random stop if zone has no stops
-        origin_stop = (
-            random.choice(origin_stops).id
-            if origin_stops
-            else self.stop_registry.get_random_stop().id
+        return self._generate_batch(timestamp, 1)[0]
+
+    def _generate_batch(
+        self, timestamp: datetime, count: int, stamp: str | None = None
+    ) -> list[TripRequest]:
+        """Generate a batch of trip requests sharing the same timestamp"""
+        if stamp is None:
+            stamp = timestamp.strftime("%Y%m%d_%H%M%S")
+        return [TripRequest(*trip) for trip in self._draw_trips(timestamp, count, stamp)]
+
+    @property
+    def output_format(self) -> str:
+        """Output format of the stream, either json or text"""
+        return self._output_format
+
+    @output_format.setter
+    def output_format(self, output_format: str) -> None:
+        self._output_format = output_format
+        # Bind the renderer once so the per-trip path never checks the format
+        if output_format == "json":
+            self._render_batch = self._render_json_batch
+        else:
+            self._render_batch = self._render_text_batch
+
+    def _render_json_batch(
+        self, timestamp: datetime, count: int, stamp: str, trips: Iterable[TripRow] | None = None
+    ) -> list[str]:
+        """Render a batch of trips straight to JSON lines, drawing them unless given"""
+        # Skip building TripRequest objects and format the shared timestamp once
+        if trips is None:
+            trips = self._draw_trips(timestamp.isoformat(), count, stamp)
+        return [format_trip_json(*trip) for trip in trips]
+
+    def _render_text_batch(
+        self, timestamp: datetime, count: int, stamp: str, trips: Iterable[TripRow] | None = None
+    ) -> list[str]:
+        """Render a batch of trips as text lines, drawing them unless given"""
+        # Text output only shows ids, so no other trip fields are drawn
+        if trips is None:
+            trip_ids = self._draw_trip_ids(count, stamp)
+        else:
+            trip_ids = [trip[0] for trip in trips]
+        return [f"Generated trip: {trip_id}" for trip_id in trip_ids]
+
+    def _draw_trips(
+        self, timestamp: _T, count: int, stamp: str
+    ) -> Iterator[tuple[str, str, str, _T, int, str, int]]:
+        """Draw ids and random fields for a batch of trips, one tuple per trip"""
+        # Stops or zones added to the registry since the last draw change the weights
+        if self._stop_table_version != self.stop_registry.version:
+            self._refresh_stop_table()
+        # Draw every field for the whole batch at once
+        origin_stops = self._choices(self._stop_ids, cum_weights=self._stop_cum_weights, k=count)
+        destination_stops = self._choices(
+            self._stop_ids, cum_weights=self._stop_cum_weights, k=count
         )
-        destination_stop = (
-            random.choice(destination_stops).id
-            if destination_stops
-            else self.stop_registry.get_random_stop().id
+        passenger_counts = self._choices(range(1, 5), k=count)
+        trip_purposes = self._choices(TRIP_PURPOSES, k=count)
+        priorities = self._choices(range(1, 4), k=count)
+        return zip(
+            self._draw_trip_ids(count, stamp),
+            origin_stops,
+            destination_stops,
+            repeat(timestamp, count),
+            passenger_counts,
+            trip_purposes,
+            priorities,
+            strict=True,
         )
-        # Generate trip request
-        trip_request = TripRequest(
-            id=f"trip_{timestamp.strftime('%Y%m%d_%H%M%S')}_{random.randint(1000, 9999)}",
-            origin_stop_id=origin_stop,
-            destination_stop_id=destination_stop,
-            timestamp=timestamp,
-            passenger_count=random.randint(1, 4),
-            trip_purpose=random.choice(["work", "shopping", "leisure", "medical", "education"]),
-            priority=random.randint(1, 3),
+
+    def _draw_trip_ids(self, count: int, stamp: str) -> list[str]:
+        """Assign the next trip ids for a batch"""
+        prefix = f"trip_{stamp}_"
+        first_number = self._next_trip_number
+        self._next_trip_number += count * self._trip_number_step
+        return [
+            prefix + str(number)
+            for number in range(first_number, self._next_trip_number, self._trip_number_step)
+        ]
+
+    def _refresh_stop_table(self) -> None:
+        """Rebuild the endpoint table from the current stop registry"""
+        self._stop_ids, self._stop_cum_weights = self._build_stop_table(self._zone_ids)
+        self._stop_table_version = self.stop_registry.version
+
+    def _build_stop_table(self, zone_ids: list[str]) -> tuple[list[str], list[float]]:
+        """Build stop ids and cumulative weights for drawing trip endpoints
+
+        An endpoint picks one of the configured zones uniformly, then a stop
+        in that zone uniformly, falling back to a zone-weighted random stop
+        when the zone has no stops. Both stages are folded into one weight
+        per stop so a whole batch can be drawn with a single choices call.
+        """
+        stops = self.stop_registry.stops
+        stop_weights = self.stop_registry.get_stop_weights()
+        zone_draws = Counter(zone_ids)
+        stops_per_zone = Counter(stop.zone_id for stop in stops)
+        empty_zone_draws = sum(
+            draws for zone_id, draws in zone_draws.items() if zone_id not in stops_per_zone
         )
-        return trip_request
+        fallback_scale = empty_zone_draws / sum(stop_weights) if empty_zone_draws else 0.0
+        weights = [
+            zone_draws[stop.zone_id] / stops_per_zone[stop.zone_id] + fallback_scale * weight
+            for stop, weight in zip(stops, stop_weights, strict=True)
+        ]
+        return [stop.id for stop in stops], list(accumulate(weights))
 
     def _send_to_output_stream(self, trip_request: TripRequest) -> None:
-        """Send trip request to output stream"""
-        if self.output_format == "json":
-            output = trip_request.to_json()
-            print(output, flush=True)  # For now, print to console
-        else:
-            print(f"Generated trip: {trip_request.id}")
+        """Queue trip request for the output stream"""
+        # Render the existing trip through the bound batch renderer rather than drawing one
+        trip = (
+            trip_request.id,
+            trip_request.origin_stop_id,
+            trip_request.destination_stop_id,
+            trip_request.timestamp.isoformat(),
+            trip_request.passenger_count,
+            trip_request.trip_purpose,
+            trip_request.priority,
+        )
+        self._pending.extend(self._render_batch(trip_request.timestamp, 1, "", [trip]))
+
+    def _flush_output(self) -> None:
+        """Write all queued output lines with a single write and flush"""
+        if not self._pending:
+            return
+        self._write_output("\n".join(self._pending) + "\n")
+        self._pending.clear()
+
+    @staticmethod
+    def _write_stdout(chunk: str) -> None:
+        """Write a chunk of output lines to stdout"""
+        sys.stdout.write(chunk)
+        sys.stdout.flush()
+
+
+def _run_worker(
+    config_path: str,
+    index: int,
+    workers: int,
+    output_queue: multiprocessing.queues.Queue[str | None],
+    stop_event: multiprocessing.synchronize.Event,
+) -> None:
+    """Run one demand shard in a worker process, sending output to the parent"""
+    # The parent process handles Ctrl+C and stops workers through stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    generator = DemandGenerator(config_path)
+    generator._shard_index = index
+    generator._shard_count = workers
+    generator._next_trip_number = index + 1
+    generator._trip_number_step = workers
+    generator._write_output = output_queue.put
+    generator.start_streaming()
+    stop_event.wait()
+    generator.stop_streaming()
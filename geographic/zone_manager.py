@@ -1,8 +1,15 @@
+import math
 import random
-from dataclasses import dataclass
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass, field
 
+# Length of one degree of latitude on a spherical Earth of radius 6371 km
+KM_PER_DEGREE = 111.195
+# Height of the latitude bands stops are bucketed into, roughly 1 km
+BAND_HEIGHT_DEG = 0.01
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class GeographicZone:
     """Represents a geographic zone with boundaries and properties"""
 
@@ -12,17 +19,36 @@ class GeographicZone:
     center_lon: float
     radius_km: float
     demand_weight: float = 1.0
+    # Squared radius in degrees of latitude, so point checks can skip the square root
+    _radius_deg_sq: float = field(init=False, repr=False, compare=False)
+    # Degrees of longitude shrink by cos(latitude) away from the equator
+    _lon_scale: float = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Frozen, so the derived fields are set through object.__setattr__
+        object.__setattr__(self, "_radius_deg_sq", (self.radius_km / KM_PER_DEGREE) ** 2)
+        object.__setattr__(self, "_lon_scale", math.cos(math.radians(self.center_lat)))
 
     def is_point_in_zone(self, lat: float, lon: float) -> bool:
         """Check if a point is within this zone (simplified circular boundary)"""
-        # Simple distance calculation (not precise for large distances)
+        # Equirectangular approximation, accurate for zone-sized radii away from the poles
         lat_diff = lat - self.center_lat
-        lon_diff = lon - self.center_lon
-        distance_km = ((lat_diff**2 + lon_diff**2) ** 0.5) * 111  # Rough km conversion
-        return bool(distance_km <= self.radius_km)
+        lon_diff = (lon - self.center_lon) * self._lon_scale
+        return bool(lat_diff * lat_diff + lon_diff * lon_diff <= self._radius_deg_sq)
+
+    def bounding_box(self) -> tuple[float, float, float, float]:
+        """Get the (min_lat, min_lon, max_lat, max_lon) box enclosing this zone"""
+        lat_radius = self.radius_km / KM_PER_DEGREE
+        lon_radius = lat_radius / self._lon_scale
+        return (
+            self.center_lat - lat_radius,
+            self.center_lon - lon_radius,
+            self.center_lat + lat_radius,
+            self.center_lon + lon_radius,
+        )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Stop:
     """Represents a transit stop"""
 
@@ -34,53 +60,245 @@ class Stop:
     stop_type: str = "bus"  # bus, train, metro, etc.
 
 
+# Default zones and stops (example city layout), built once and shared by every registry
+_DEFAULT_ZONES = (
+    GeographicZone("downtown", "Downtown", 40.7589, -73.9851, 2.0, 3.0),
+    GeographicZone("midtown", "Midtown", 40.7505, -73.9934, 1.5, 2.5),
+    GeographicZone("uptown", "Uptown", 40.7831, -73.9712, 2.5, 1.5),
+    GeographicZone("suburbs", "Suburbs", 40.7282, -73.7949, 5.0, 1.0),
+)
+_DEFAULT_STOPS = (
+    Stop("stop_001", "Main St & 1st Ave", 40.7589, -73.9851, "downtown"),
+    Stop("stop_002", "Central Station", 40.7505, -73.9934, "midtown"),
+    Stop("stop_003", "Park Plaza", 40.7831, -73.9712, "uptown"),
+    Stop("stop_004", "Mall Transit Center", 40.7282, -73.7949, "suburbs"),
+    Stop("stop_005", "University Campus", 40.7614, -73.9776, "downtown"),
+    Stop("stop_006", "Hospital District", 40.7505, -73.9834, "midtown"),
+)
+
+
 class StopRegistry:
     """Manages all transit stops in the system"""
 
     def __init__(self) -> None:
         self.stops: list[Stop] = []
         self.zones: list[GeographicZone] = []
+        # Private random source, bound once for the sampling hot path
+        self._rng = random.Random()
+        self._random = self._rng.random
+        # Bumped on every change to stops or zones, so callers can detect stale copies
+        self.version = 0
+        # Caches derived from stops/zones, rebuilt whenever either changes
+        self._alias_prob: list[float] = []
+        self._alias: list[int] = []
+        self._stops_by_zone: dict[str, tuple[Stop, ...]] = {}
+        self._zone_boxes: list[tuple[float, float, float, float, GeographicZone]] = []
+        # Stop coordinates as parallel columns, and latitude bands of stop indexes
+        # kept sorted by longitude alongside the matching longitudes
+        self._stop_lats: list[float] = []
+        self._stop_lons: list[float] = []
+        self._bands: dict[int, tuple[list[float], list[int]]] = {}
+        # Sorted keys of the populated bands, so searches can skip empty ones
+        self._band_keys: list[int] = []
         self._initialize_default_data()
+        self._rebuild_indexes()
 
     def _initialize_default_data(self) -> None:
         """Initialize with some default zones and stops for testing"""
-        # Default zones (example city layout)
-        self.zones = [
-            GeographicZone("downtown", "Downtown", 40.7589, -73.9851, 2.0, 3.0),
-            GeographicZone("midtown", "Midtown", 40.7505, -73.9934, 1.5, 2.5),
-            GeographicZone("uptown", "Uptown", 40.7831, -73.9712, 2.5, 1.5),
-            GeographicZone("suburbs", "Suburbs", 40.7282, -73.7949, 5.0, 1.0),
-        ]
+        # Fresh lists per registry; the frozen zones and stops themselves are shared
+        self.zones = list(_DEFAULT_ZONES)
+        self.stops = list(_DEFAULT_STOPS)
 
-        # Default stops
-        self.stops = [
-            Stop("stop_001", "Main St & 1st Ave", 40.7589, -73.9851, "downtown"),
-            Stop("stop_002", "Central Station", 40.7505, -73.9934, "midtown"),
-            Stop("stop_003", "Park Plaza", 40.7831, -73.9712, "uptown"),
-            Stop("stop_004", "Mall Transit Center", 40.7282, -73.7949, "suburbs"),
-            Stop("stop_005", "University Campus", 40.7614, -73.9776, "downtown"),
-            Stop("stop_006", "Hospital District", 40.7505, -73.9834, "midtown"),
-        ]
+    def _rebuild_indexes(self) -> None:
+        """Recompute cached stop weights, per-zone stop lists, zone boxes and bands"""
+        self._rebuild_sampler()
+        self._zone_boxes = [(*zone.bounding_box(), zone) for zone in self.zones]
+        stops_by_zone: dict[str, list[Stop]] = {}
+        self._stop_lats = [stop.lat for stop in self.stops]
+        self._stop_lons = [stop.lon for stop in self.stops]
+        band_members: dict[int, list[int]] = {}
+        for index, stop in enumerate(self.stops):
+            stops_by_zone.setdefault(stop.zone_id, []).append(stop)
+            band_members.setdefault(self._band_of(stop.lat), []).append(index)
+        self._bands = {}
+        for band, indexes in band_members.items():
+            indexes.sort(key=self._stop_lons.__getitem__)
+            self._bands[band] = ([self._stop_lons[index] for index in indexes], indexes)
+        self._band_keys = sorted(self._bands)
+        # Tuples so lookups can hand out the cached value without copying it
+        self._stops_by_zone = {
+            zone_id: tuple(zone_stops) for zone_id, zone_stops in stops_by_zone.items()
+        }
 
-    def get_random_stop(self) -> Stop:
-        """Get a random stop weighted by zone demand"""
+    @staticmethod
+    def _band_of(lat: float) -> int:
+        """Get the latitude band a point falls into"""
+        return math.floor(lat / BAND_HEIGHT_DEG)
+
+    def _rebuild_sampler(self) -> None:
+        """Recompute the alias tables used by get_random_stop"""
+        self.version += 1
+        self._alias_prob, self._alias = self._build_alias_table(self.get_stop_weights())
+
+    @staticmethod
+    def _build_alias_table(weights: list[float]) -> tuple[list[float], list[int]]:
+        """Build Walker/Vose alias tables for drawing indexes in proportion to weights
+
+        Slot i keeps its own index with probability prob[i] and otherwise
+        yields alias[i], so a draw costs one uniform slot pick and one compare
+        however many weights there are.
+        """
+        count = len(weights)
+        # All-zero weights fall through to every slot keeping itself: a uniform draw
+        scale = count / (sum(weights) or 1.0)
+        scaled = [weight * scale for weight in weights]
+        prob = [1.0] * count
+        alias = list(range(count))
+        small = [index for index, value in enumerate(scaled) if value < 1.0]
+        large = [index for index, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            short_index = small.pop()
+            long_index = large.pop()
+            prob[short_index] = scaled[short_index]
+            alias[short_index] = long_index
+            # The long slot donates the probability mass the short slot lacks
+            scaled[long_index] -= 1.0 - scaled[short_index]
+            (small if scaled[long_index] < 1.0 else large).append(long_index)
+        # Slots left in either list are only off 1.0 by rounding and keep themselves
+        return prob, alias
+
+    def get_stop_weights(self) -> list[float]:
+        """Get the zone demand weight of each stop, in the same order as stops"""
         zone_weights = {zone.id: zone.demand_weight for zone in self.zones}
-        weighted_stops = []
+        return [zone_weights.get(stop.zone_id, 1.0) for stop in self.stops]
 
-        for stop in self.stops:
-            weight = zone_weights.get(stop.zone_id, 1.0)
-            weighted_stops.extend([stop] * int(weight * 10))  # Scale weights
+    def get_random_stop(self) -> Stop:
+        """Get a random stop weighted by zone demand"""
+        index = int(self._random() * len(self.stops))
+        if self._random() >= self._alias_prob[index]:
+            index = self._alias[index]
+        return self.stops[index]
 
-        return random.choice(weighted_stops)
+    def get_random_stops(self, count: int) -> list[Stop]:
+        """Get several random stops weighted by zone demand, drawn independently"""
+        # Bind everything the loop touches once for the whole batch
+        stops = self.stops
+        stop_count = len(stops)
+        alias_prob = self._alias_prob
+        alias = self._alias
+        random_value = self._random
+        drawn = []
+        for _ in range(count):
+            index = int(random_value() * stop_count)
+            if random_value() >= alias_prob[index]:
+                index = alias[index]
+            drawn.append(stops[index])
+        return drawn
 
-    def get_stops_in_zone(self, zone_id: str) -> list[Stop]:
+    def get_stops_in_zone(self, zone_id: str) -> tuple[Stop, ...]:
         """Get all stops in a specific zone"""
-        return [stop for stop in self.stops if stop.zone_id == zone_id]
+        return self._stops_by_zone.get(zone_id, ())
+
+    def find_zones_containing(self, lat: float, lon: float) -> list[GeographicZone]:
+        """Get all zones containing a point, in registry order"""
+        # Cheap box rejection first, the circular test only runs for nearby zones
+        return [
+            zone
+            for min_lat, min_lon, max_lat, max_lon, zone in self._zone_boxes
+            if min_lat <= lat <= max_lat
+            and min_lon <= lon <= max_lon
+            and zone.is_point_in_zone(lat, lon)
+        ]
+
+    def stop_indexes_within(self, lat: float, lon: float, radius_km: float) -> list[int]:
+        """Get indexes into stops of all stops within radius_km of a point, in stop order"""
+        radius_deg = radius_km / KM_PER_DEGREE
+        radius_deg_sq = radius_deg * radius_deg
+        lon_scale = math.cos(math.radians(lat))
+        lon_radius = radius_deg / lon_scale
+        # Read coordinates from the columns rather than touching each Stop object
+        stop_lats = self._stop_lats
+        nearby = []
+        # Only bands overlapping the search circle can hold matching stops, and
+        # within a band only the stops in the circle's longitude span
+        for band in range(self._band_of(lat - radius_deg), self._band_of(lat + radius_deg) + 1):
+            if band not in self._bands:
+                continue
+            band_lons, band_indexes = self._bands[band]
+            start = bisect_left(band_lons, lon - lon_radius)
+            end = bisect_right(band_lons, lon + lon_radius, start)
+            for position in range(start, end):
+                lat_diff = stop_lats[band_indexes[position]] - lat
+                lon_diff = (band_lons[position] - lon) * lon_scale
+                if lat_diff * lat_diff + lon_diff * lon_diff <= radius_deg_sq:
+                    nearby.append(band_indexes[position])
+        nearby.sort()
+        return nearby
+
+    def stops_within(self, lat: float, lon: float, radius_km: float) -> list[Stop]:
+        """Get all stops within radius_km of a point, in registry order"""
+        stops = self.stops
+        return [stops[index] for index in self.stop_indexes_within(lat, lon, radius_km)]
+
+    def nearest_stop(self, lat: float, lon: float) -> Stop | None:
+        """Get the stop closest to a point, or None if the registry has no stops"""
+        if not self._band_keys:
+            return None
+        lon_scale = math.cos(math.radians(lat))
+        stop_lats = self._stop_lats
+        band_keys = self._band_keys
+        # Walk the populated bands outward from the point's own band, always
+        # taking whichever side's next band edge is closer
+        upper = bisect_left(band_keys, self._band_of(lat))
+        lower = upper - 1
+        best_index = -1
+        best_dist_sq = math.inf
+        while lower >= 0 or upper < len(band_keys):
+            upper_gap = (
+                max(0.0, band_keys[upper] * BAND_HEIGHT_DEG - lat)
+                if upper < len(band_keys)
+                else math.inf
+            )
+            lower_gap = lat - (band_keys[lower] + 1) * BAND_HEIGHT_DEG if lower >= 0 else math.inf
+            if upper_gap <= lower_gap:
+                gap, band = upper_gap, band_keys[upper]
+                upper += 1
+            else:
+                gap, band = lower_gap, band_keys[lower]
+                lower -= 1
+            # No stop in this or any later band is nearer than the band's edge
+            if gap * gap > best_dist_sq:
+                break
+            band_lons, band_indexes = self._bands[band]
+            for band_lon, index in zip(band_lons, band_indexes, strict=True):
+                lat_diff = stop_lats[index] - lat
+                lon_diff = (band_lon - lon) * lon_scale
+                dist_sq = lat_diff * lat_diff + lon_diff * lon_diff
+                if dist_sq < best_dist_sq:
+                    best_index = index
+                    best_dist_sq = dist_sq
+        return self.stops[best_index]
 
     def add_stop(self, stop: Stop) -> None:
         """Add a new stop to the registry"""
         self.stops.append(stop)
+        # Only the new stop's zone changes, so extend that entry instead of regrouping
+        zone_stops = self._stops_by_zone.get(stop.zone_id, ())
+        self._stops_by_zone[stop.zone_id] = (*zone_stops, stop)
+        self._stop_lats.append(stop.lat)
+        self._stop_lons.append(stop.lon)
+        band = self._band_of(stop.lat)
+        if band not in self._bands:
+            insort(self._band_keys, band)
+        band_lons, band_indexes = self._bands.setdefault(band, ([], []))
+        position = bisect_right(band_lons, stop.lon)
+        band_lons.insert(position, stop.lon)
+        band_indexes.insert(position, len(self.stops) - 1)
+        self._rebuild_sampler()
 
     def add_zone(self, zone: GeographicZone) -> None:
         """Add a new zone to the registry"""
         self.zones.append(zone)
+        self._zone_boxes.append((*zone.bounding_box(), zone))
+        # Zones only affect stop weights, the per-zone stop lists stay valid
+        self._rebuild_sampler()
@@ -6,6 +6,7 @@ Main entry point for the demand generator.
 import argparse
 import signal
 import sys
+import time
 from typing import Any
 
 from demand_generator import DemandGenerator
@@ -29,6 +30,12 @@ def main() -> None:
         type=int,
         help="Run for specified number of seconds (default: run indefinitely)",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes sharing the demand (default: 1)",
+    )
 
     args = parser.parse_args()
 
@@ -37,7 +44,7 @@ def main() -> None:
 
     try:
         # Initialize demand generator
-        generator = DemandGenerator(args.config)
+        generator = DemandGenerator(args.config, workers=args.workers)
 
         # Only print status messages if not in JSON output mode
         if generator.output_format != "json":
@@ -50,8 +57,6 @@ def main() -> None:
         if args.duration:
             if generator.output_format != "json":
                 print(f"Running for {args.duration} seconds...")
-            import time
-
             time.sleep(args.duration)
             generator.stop_streaming()
             if generator.output_format != "json":
@@ -60,8 +65,6 @@ def main() -> None:
             # Run indefinitely until interrupted
             try:
                 while generator.running:
-                    import time
-
                     time.sleep(1)
             except KeyboardInterrupt:
                 pass
@@ -1,9 +1,33 @@
 import json
 from dataclasses import dataclass
 from datetime import datetime
+from json.encoder import encode_basestring_ascii as _quote
 
 
-@dataclass
+def format_trip_json(
+    trip_id: str,
+    origin_stop_id: str,
+    destination_stop_id: str,
+    timestamp: str,
+    passenger_count: int,
+    trip_purpose: str,
+    priority: int,
+) -> str:
+    """Format trip request fields as JSON, with the timestamp already in ISO format"""
+    # The schema is fixed, so format it directly rather than building a dict
+    # for json.dumps; the output is identical to json.dumps of that dict
+    return (
+        f'{{"id": {_quote(trip_id)}, '
+        f'"origin_stop_id": {_quote(origin_stop_id)}, '
+        f'"destination_stop_id": {_quote(destination_stop_id)}, '
+        f'"timestamp": "{timestamp}", '
+        f'"passenger_count": {passenger_count:d}, '
+        f'"trip_purpose": {_quote(trip_purpose)}, '
+        f'"priority": {priority:d}}}'
+    )
+
+
+@dataclass(slots=True)
 class TripRequest:
     id: str
     origin_stop_id: str
@@ -15,16 +39,15 @@ class TripRequest:
 
     def to_json(self) -> str:
         """Convert to JSON format for streaming"""
-        data = {
-            "id": self.id,
-            "origin_stop_id": self.origin_stop_id,
-            "destination_stop_id": self.destination_stop_id,
-            "timestamp": self.timestamp.isoformat(),
-            "passenger_count": self.passenger_count,
-            "trip_purpose": self.trip_purpose,
-            "priority": self.priority,
-        }
-        return json.dumps(data)
+        return format_trip_json(
+            self.id,
+            self.origin_stop_id,
+            self.destination_stop_id,
+            self.timestamp.isoformat(),
+            self.passenger_count,
+            self.trip_purpose,
+            self.priority,
+        )
 
     @classmethod
     def from_json(cls, json_str: str) -> "TripRequest":
@@ -1,61 +1,101 @@
+import math
+from collections.abc import Callable, Iterable
 from datetime import datetime
-from typing import Any
+from typing import Any, ClassVar, TypeVar
 
+_T = TypeVar("_T")
 
+try:
+    from mypy_extensions import mypyc_attr
+except ImportError:  # mypy-extensions is only needed when compiling with mypyc
+
+    def mypyc_attr(*attrs: str, **kwattrs: object) -> Callable[[_T], _T]:
+        return lambda cls: cls
+
+
+# Custom patterns subclass TimePattern from plain Python, which a mypyc build
+# of this module only allows when the class opts in
+@mypyc_attr(allow_interpreted_subclasses=True)
 class TimePattern:
     """Base class for time-based demand patterns"""
 
+    # True when the multiplier depends only on weekday and hour, which lets
+    # TemporalPatternEngine fold the pattern into its precomputed table
+    cacheable: ClassVar[bool] = False
+
     def get_demand_multiplier(self, timestamp: datetime) -> float:
         """Return demand multiplier for given timestamp"""
         raise NotImplementedError
 
+    def get_slot_multiplier(self, weekday: int, hour: int) -> float:
+        """Return demand multiplier for an hour of the week, used for cacheable patterns"""
+        # 2000-01-03 is a Monday, so the day offset equals the weekday
+        return self.get_demand_multiplier(datetime(2000, 1, 3 + weekday, hour))
+
 
 class HourlyPattern(TimePattern):
     """Demand pattern based on hour of day"""
 
+    cacheable = True
+
     def __init__(self, hourly_multipliers: dict[int, float]):
         self.hourly_multipliers = hourly_multipliers
+        # One slot per hour, so lookups index a tuple instead of probing the dict
+        self._lut = tuple(hourly_multipliers.get(hour, 1.0) for hour in range(24))
 
     def get_demand_multiplier(self, timestamp: datetime) -> float:
-        return self.hourly_multipliers.get(timestamp.hour, 1.0)
+        return self._lut[timestamp.hour]
+
+    def get_slot_multiplier(self, weekday: int, hour: int) -> float:
+        return self._lut[hour]
 
 
 class WeekdayPattern(TimePattern):
     """Demand pattern based on day of week"""
 
+    cacheable = True
+
     def __init__(self, weekday_multipliers: dict[int, float]):
         # 0=Monday, 1=Tuesday, ..., 6=Sunday
         self.weekday_multipliers = weekday_multipliers
+        self._lut = tuple(weekday_multipliers.get(weekday, 1.0) for weekday in range(7))
 
     def get_demand_multiplier(self, timestamp: datetime) -> float:
-        return self.weekday_multipliers.get(timestamp.weekday(), 1.0)
+        return self._lut[timestamp.weekday()]
+
+    def get_slot_multiplier(self, weekday: int, hour: int) -> float:
+        return self._lut[weekday]
 
 
 class RushHourPattern(TimePattern):
     """Special pattern for rush hour peaks"""
 
+    cacheable = True
+
     def __init__(
         self,
-        morning_peak: tuple[int, int] = (7, 9),
-        evening_peak: tuple[int, int] = (17, 19),
+        morning_peak: tuple[float, float] = (7, 9),
+        evening_peak: tuple[float, float] = (17, 19),
         peak_multiplier: float = 2.0,
     ):
         self.morning_start, self.morning_end = morning_peak
         self.evening_start, self.evening_end = evening_peak
         self.peak_multiplier = peak_multiplier
+        # Bit h is set when hour h falls in the morning or evening rush hour. The
+        # bounds come straight from config and may be fractional or out of range
+        self._mask = 0
+        for hour in range(24):
+            if (
+                self.morning_start <= hour < self.morning_end
+                or self.evening_start <= hour < self.evening_end
+            ):
+                self._mask |= 1 << hour
 
     def get_demand_multiplier(self, timestamp: datetime) -> float:
-        hour = timestamp.hour
-
-        # Morning rush hour
-        if self.morning_start <= hour < self.morning_end:
-            return self.peak_multiplier
-
-        # Evening rush hour
-        if self.evening_start <= hour < self.evening_end:
-            return self.peak_multiplier
+        return self.peak_multiplier if (self._mask >> timestamp.hour) & 1 else 1.0
 
-        return 1.0
+    def get_slot_multiplier(self, weekday: int, hour: int) -> float:
+        return self.peak_multiplier if (self._mask >> hour) & 1 else 1.0
 
 
 class TemporalPatternEngine:
@@ -65,6 +105,7 @@ class TemporalPatternEngine:
         self.patterns: list[TimePattern] = []
         self.base_rate = config.get("base_rate", 10.0)  # requests per minute
         self._initialize_patterns(config)
+        self._build_rate_table()
 
     def _initialize_patterns(self, config: dict[str, Any]) -> None:
         """Initialize patterns from configuration"""
@@ -129,15 +170,46 @@ class TemporalPatternEngine:
             # Default rush hour pattern
             self.patterns.append(RushHourPattern())
 
+    def _build_rate_table(self) -> None:
+        """Precompute the combined cacheable multiplier for every weekday/hour"""
+        cacheable = [pattern for pattern in self.patterns if pattern.cacheable]
+        self._dynamic_patterns = tuple(
+            pattern for pattern in self.patterns if not pattern.cacheable
+        )
+        self._rate_table: list[float] = []
+
+        for weekday in range(7):
+            for hour in range(24):
+                multiplier = 1.0
+                for pattern in cacheable:
+                    multiplier *= pattern.get_slot_multiplier(weekday, hour)
+                self._rate_table.append(multiplier)
+
     def calculate_demand_rate(self, timestamp: datetime) -> float:
         """Calculate current demand rate based on all patterns"""
-        total_multiplier = 1.0
+        total_multiplier = self._rate_table[timestamp.weekday() * 24 + timestamp.hour]
 
-        for pattern in self.patterns:
-            total_multiplier *= pattern.get_demand_multiplier(timestamp)
+        if self._dynamic_patterns:
+            total_multiplier = math.prod(
+                [pattern.get_demand_multiplier(timestamp) for pattern in self._dynamic_patterns],
+                start=total_multiplier,
+            )
 
         return float(self.base_rate * total_multiplier)
 
+    def calculate_demand_rate_batch(self, timestamps: Iterable[datetime]) -> list[float]:
+        """Calculate demand rates for many timestamps at once"""
+        if self._dynamic_patterns:
+            return [self.calculate_demand_rate(timestamp) for timestamp in timestamps]
+        # Only table-backed patterns: one lookup per timestamp, no pattern dispatch
+        rate_table = self._rate_table
+        base_rate = self.base_rate
+        return [
+            float(base_rate * rate_table[timestamp.weekday() * 24 + timestamp.hour])
+            for timestamp in timestamps
+        ]
+
     def add_pattern(self, pattern: TimePattern) -> None:
         """Add a custom pattern to the engine"""
         self.patterns.append(pattern)
+        self._build_rate_table()
@@ -1,20 +1,30 @@
+import io
 import json
 import os
 import tempfile
 import time
 import unittest
 from datetime import datetime
+from itertools import accumulate, pairwise
+from typing import Any
 from unittest.mock import MagicMock, patch
 
-from demand_generator import DemandGenerator
+import yaml
+
+from demand_generator import TRIP_PURPOSES, DemandGenerator
+from geographic.zone_manager import Stop
 from models.trip_request import TripRequest
+from patterns.temporal_engine import TemporalPatternEngine
 
 
 class TestDemandGenerator(unittest.TestCase):
-    def setUp(self) -> None:
-        """Set up test fixtures"""
-        # Create a temporary config file for testing
-        self.config_data = {
+    config_data: dict[str, Any]
+    config_path: str
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Write the shared config fixture once for the whole class"""
+        cls.config_data = {
             "streaming": {
                 "rate_per_second": 0.1,
                 "output_format": "json",
@@ -54,14 +64,23 @@ class TestDemandGenerator(unittest.TestCase):
             },
         }
 
-        # Create temporary config file
-        self.temp_config = tempfile.NamedTemporaryFile(mode="w", suffix=".yaml", delete=False)
-        import yaml
+        cls.config_path = cls.write_config(cls.config_data)
 
-        yaml.dump(self.config_data, self.temp_config)
-        self.temp_config.close()
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """Remove the shared config fixture"""
+        os.unlink(cls.config_path)
 
-        self.demand_generator = DemandGenerator(self.temp_config.name)
+    @staticmethod
+    def write_config(config_data: dict[str, Any]) -> str:
+        """Write a config to a temporary YAML file and return its path"""
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".yaml", delete=False) as f:
+            yaml.dump(config_data, f)
+        return f.name
+
+    def setUp(self) -> None:
+        """Set up test fixtures"""
+        self.demand_generator = DemandGenerator(self.config_path)
 
     def tearDown(self) -> None:
         """Clean up test fixtures"""
@@ -69,9 +88,6 @@ class TestDemandGenerator(unittest.TestCase):
         if self.demand_generator.running:
             self.demand_generator.stop_streaming()
 
-        # Remove temporary config file
-        os.unlink(self.temp_config.name)
-
     def test_initialization(self) -> None:
         """Test that DemandGenerator initializes correctly"""
         self.assertIsNotNone(self.demand_generator.config)
@@ -96,6 +112,21 @@ class TestDemandGenerator(unittest.TestCase):
         count = self.demand_generator._calculate_requests_count(0.0)
         self.assertEqual(count, 0)
 
+    def test_shard_counts_sum_without_bursts(self) -> None:
+        """Test that worker shards split the per-tick count without losing demand"""
+        self.demand_generator.burst_enabled = False
+        expected = self.demand_generator._calculate_requests_count(7.9)
+        self.assertEqual(expected, 7)
+
+        for workers in (2, 3, 4, 8, 16):
+            self.demand_generator._shard_count = workers
+            counts = []
+            for index in range(workers):
+                self.demand_generator._shard_index = index
+                counts.append(self.demand_generator._calculate_requests_count(7.9))
+            self.assertEqual(sum(counts), expected)
+            self.assertLessEqual(max(counts) - min(counts), 1)
+
     @patch("demand_generator.datetime")
     def test_generate_trip_request(self, mock_datetime: MagicMock) -> None:
         """Test trip request generation"""
@@ -109,53 +140,185 @@ class TestDemandGenerator(unittest.TestCase):
         self.assertIsNotNone(trip_request.origin_stop_id)
         self.assertIsNotNone(trip_request.destination_stop_id)
         self.assertEqual(trip_request.timestamp, test_time)
-        self.assertIn(trip_request.passenger_count, range(1, 5))
-        self.assertIn(
-            trip_request.trip_purpose,
-            ["work", "shopping", "leisure", "medical", "education"],
+        self.assertTrue(1 <= trip_request.passenger_count <= 4)
+        self.assertIn(trip_request.trip_purpose, TRIP_PURPOSES)
+        self.assertTrue(1 <= trip_request.priority <= 3)
+
+    def test_generate_batch(self) -> None:
+        """Test batched trip request generation"""
+        test_time = datetime(2023, 6, 15, 8, 30, 0)
+        batch = self.demand_generator._generate_batch(test_time, 50)
+
+        self.assertEqual(len(batch), 50)
+        for trip_request in batch:
+            self.assertTrue(trip_request.id.startswith("trip_20230615_083000_"))
+            self.assertEqual(trip_request.timestamp, test_time)
+            self.assertTrue(1 <= trip_request.passenger_count <= 4)
+            self.assertTrue(1 <= trip_request.priority <= 3)
+
+        self.assertEqual(self.demand_generator._generate_batch(test_time, 0), [])
+
+    def test_generate_batch_shares_field_strings(self) -> None:
+        """Test that drawn stop ids and purposes reuse the canonical string objects"""
+        test_time = datetime(2023, 6, 15, 8, 30, 0)
+        stop_ids = {id(stop.id) for stop in self.demand_generator.stop_registry.stops}
+        purposes = {id(purpose) for purpose in TRIP_PURPOSES}
+
+        for trip_request in self.demand_generator._generate_batch(test_time, 50):
+            self.assertIn(id(trip_request.origin_stop_id), stop_ids)
+            self.assertIn(id(trip_request.destination_stop_id), stop_ids)
+            self.assertIn(id(trip_request.trip_purpose), purposes)
+
+    def test_generate_batch_ids_are_sequential(self) -> None:
+        """Test that trip ids share the tick prefix and never repeat"""
+        test_time = datetime(2023, 6, 15, 8, 30, 0)
+        first = self.demand_generator._generate_batch(test_time, 3)
+        second = self.demand_generator._generate_batch(test_time, 2, "20230615_083001")
+
+        self.assertEqual(
+            [trip_request.id for trip_request in first + second],
+            [
+                "trip_20230615_083000_1",
+                "trip_20230615_083000_2",
+                "trip_20230615_083000_3",
+                "trip_20230615_083001_4",
+                "trip_20230615_083001_5",
+            ],
         )
-        self.assertIn(trip_request.priority, range(1, 4))
 
-    @patch("builtins.print")
-    def test_send_to_output_stream_json(self, mock_print: MagicMock) -> None:
+    def test_build_stop_table(self) -> None:
+        """Test that endpoint weights follow zone-then-stop selection"""
+        registry = self.demand_generator.stop_registry
+        stop_ids, cum_weights = self.demand_generator._build_stop_table(["downtown", "uptown"])
+
+        self.assertEqual(stop_ids, [stop.id for stop in registry.stops])
+        weights = [b - a for a, b in pairwise([0.0, *cum_weights])]
+        by_stop = dict(zip(stop_ids, weights, strict=True))
+        # Two downtown stops share one zone draw, uptown has a single stop
+        self.assertAlmostEqual(by_stop["stop_001"], 0.5)
+        self.assertAlmostEqual(by_stop["stop_005"], 0.5)
+        self.assertAlmostEqual(by_stop["stop_003"], 1.0)
+        self.assertAlmostEqual(by_stop["stop_002"], 0.0)
+
+    def test_build_stop_table_empty_zone_fallback(self) -> None:
+        """Test that zones without stops fall back to zone-weighted stops"""
+        registry = self.demand_generator.stop_registry
+        _, cum_weights = self.demand_generator._build_stop_table(["test_zone_1"])
+
+        stop_weights = registry.get_stop_weights()
+        total = sum(stop_weights)
+        for cum_weight, expected in zip(cum_weights, accumulate(stop_weights), strict=True):
+            self.assertAlmostEqual(cum_weight, expected / total)
+
+    def test_stops_added_after_construction_are_drawn(self) -> None:
+        """Test that registry changes after construction reach the endpoint table"""
+        new_stop = Stop(
+            id="test_stop",
+            name="Test Stop",
+            lat=40.7589,
+            lon=-73.9851,
+            zone_id="test_zone_1",
+        )
+        self.demand_generator.stop_registry.add_stop(new_stop)
+
+        trips = self.demand_generator._generate_batch(datetime(2023, 6, 15, 8, 30), 20)
+
+        # test_zone_1 now has a stop of its own, which takes that zone's whole draw
+        cum_weights = self.demand_generator._stop_cum_weights
+        self.assertEqual(self.demand_generator._stop_ids[-1], "test_stop")
+        self.assertGreaterEqual(cum_weights[-1] - cum_weights[-2], 1.0)
+        endpoints = {trip.origin_stop_id for trip in trips}
+        endpoints.update(trip.destination_stop_id for trip in trips)
+        self.assertIn("test_stop", endpoints)
+
+    def test_render_batch_json(self) -> None:
+        """Test that rendered JSON lines match TripRequest serialization"""
+        test_time = datetime(2023, 6, 15, 8, 30, 0, 500000)
+        lines = self.demand_generator._render_batch(test_time, 20, "20230615_083000")
+
+        self.assertEqual(len(lines), 20)
+        for line in lines:
+            trip_request = TripRequest.from_json(line)
+            self.assertEqual(trip_request.timestamp, test_time)
+            self.assertTrue(trip_request.id.startswith("trip_20230615_083000_"))
+            self.assertEqual(trip_request.to_json(), line)
+
+    def test_render_batch_text(self) -> None:
+        """Test that text output renders only the trip ids"""
+        self.demand_generator.output_format = "text"
+        test_time = datetime(2023, 6, 15, 8, 30, 0)
+        with patch.object(self.demand_generator, "_draw_trips") as mock_draw_trips:
+            lines = self.demand_generator._render_batch(test_time, 2, "20230615_083000")
+
+        # No trip fields besides the id are drawn for text output
+        mock_draw_trips.assert_not_called()
+        self.assertEqual(
+            lines,
+            [
+                "Generated trip: trip_20230615_083000_1",
+                "Generated trip: trip_20230615_083000_2",
+            ],
+        )
+
+    @patch("demand_generator.datetime")
+    def test_read_clock(self, mock_datetime: MagicMock) -> None:
+        """Test that the coarse clock pairs the time with its id stamp"""
+        test_time = datetime(2023, 6, 15, 8, 30, 0)
+        mock_datetime.now.return_value = test_time
+
+        self.assertEqual(self.demand_generator._read_clock(), (test_time, "20230615_083000"))
+
+    @patch("sys.stdout", new_callable=io.StringIO)
+    def test_send_to_output_stream_json(self, mock_stdout: io.StringIO) -> None:
         """Test JSON output stream"""
         test_time = datetime(2023, 6, 15, 8, 30, 0)
         trip_request = self.demand_generator._generate_trip_request(test_time)
 
         self.demand_generator._send_to_output_stream(trip_request)
+        self.assertEqual(mock_stdout.getvalue(), "")
 
-        mock_print.assert_called_once()
-        output = mock_print.call_args[0][0]
+        self.demand_generator._flush_output()
+        output = mock_stdout.getvalue()
 
-        # Verify it's valid JSON
+        # Verify it's a single valid JSON line
+        self.assertTrue(output.endswith("\n"))
         parsed = json.loads(output)
         self.assertEqual(parsed["id"], trip_request.id)
 
-    @patch("builtins.print")
-    def test_send_to_output_stream_text(self, mock_print: MagicMock) -> None:
+    @patch("sys.stdout", new_callable=io.StringIO)
+    def test_send_to_output_stream_text(self, mock_stdout: io.StringIO) -> None:
         """Test text output stream"""
         self.demand_generator.output_format = "text"
         test_time = datetime(2023, 6, 15, 8, 30, 0)
         trip_request = self.demand_generator._generate_trip_request(test_time)
 
         self.demand_generator._send_to_output_stream(trip_request)
+        self.demand_generator._flush_output()
 
-        mock_print.assert_called_once()
-        output = mock_print.call_args[0][0]
+        output = mock_stdout.getvalue()
         self.assertIn("Generated trip:", output)
         self.assertIn(trip_request.id, output)
 
-    @patch("time.sleep")
-    @patch("demand_generator.datetime")
+    @patch("sys.stdout", new_callable=io.StringIO)
+    def test_flush_output_batches_lines(self, mock_stdout: io.StringIO) -> None:
+        """Test that queued lines are written together and the queue is cleared"""
+        test_time = datetime(2023, 6, 15, 8, 30, 0)
+        batch = self.demand_generator._generate_batch(test_time, 3)
+        for trip_request in batch:
+            self.demand_generator._send_to_output_stream(trip_request)
+
+        self.demand_generator._flush_output()
+        self.demand_generator._flush_output()
+
+        lines = mock_stdout.getvalue().splitlines()
+        self.assertEqual([json.loads(line)["id"] for line in lines], [t.id for t in batch])
+
+    @patch("sys.stdout", new_callable=io.StringIO)
+    @patch.object(TemporalPatternEngine, "calculate_demand_rate", return_value=20.0)
     def test_streaming_loop_single_iteration(
-        self, mock_datetime: MagicMock, mock_sleep: MagicMock
+        self, mock_rate: MagicMock, mock_stdout: io.StringIO
     ) -> None:
         """Test a single iteration of the streaming loop"""
-        # Mock current time
-        # Thursday morning rush hour
-        test_time = datetime(2023, 6, 15, 8, 30, 0)
-        mock_datetime.now.return_value = test_time
-
         # Start streaming in a separate thread
         self.demand_generator.start_streaming()
 
@@ -165,8 +328,51 @@ class TestDemandGenerator(unittest.TestCase):
         # Stop streaming
         self.demand_generator.stop_streaming()
 
-        # Verify sleep was called (indicating loop ran)
-        mock_sleep.assert_called()
+        # Verify the loop ran and produced output
+        mock_rate.assert_called()
+        self.assertNotEqual(mock_stdout.getvalue(), "")
+
+    @patch("sys.stdout", new_callable=io.StringIO)
+    @patch("demand_generator.time")
+    def test_streaming_loop_sleeps_until_deadline(
+        self, mock_time: MagicMock, mock_stdout: io.StringIO
+    ) -> None:
+        """Test that time spent generating is subtracted from the tick sleep"""
+        mock_time.monotonic.side_effect = [100.0, 100.25]
+        stop_event = MagicMock()
+        stop_event.is_set.side_effect = [False, True]
+        self.demand_generator._stop_event = stop_event
+
+        self.demand_generator._streaming_loop()
+
+        stop_event.wait.assert_called_once_with(0.75)
+
+    @patch("sys.stdout", new_callable=io.StringIO)
+    @patch("demand_generator.time")
+    def test_streaming_loop_resynchronises_when_behind(
+        self, mock_time: MagicMock, mock_stdout: io.StringIO
+    ) -> None:
+        """Test that falling more than a tick behind skips sleeping and resets"""
+        mock_time.monotonic.side_effect = [100.0, 103.0, 103.0, 103.5]
+        stop_event = MagicMock()
+        stop_event.is_set.side_effect = [False, False, True]
+        self.demand_generator._stop_event = stop_event
+
+        self.demand_generator._streaming_loop()
+
+        # First tick overran, so the second sleeps relative to the reset deadline
+        stop_event.wait.assert_called_once_with(0.5)
+
+    def test_stop_streaming_is_prompt(self) -> None:
+        """Test that stopping wakes the streaming threads instead of waiting out a tick"""
+        self.demand_generator.start_streaming()
+        time.sleep(0.05)
+
+        started = time.monotonic()
+        self.demand_generator.stop_streaming()
+
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertTrue(self.demand_generator.thread and self.demand_generator.thread.daemon)
 
     def test_start_stop_streaming(self) -> None:
         """Test starting and stopping the streaming process"""
@@ -187,6 +393,31 @@ class TestDemandGenerator(unittest.TestCase):
         if self.demand_generator.thread:
             self.assertFalse(self.demand_generator.thread.is_alive())
 
+    def test_invalid_worker_count(self) -> None:
+        """Test that at least one worker is required"""
+        with self.assertRaises(ValueError):
+            DemandGenerator(self.config_path, workers=0)
+
+    @patch("sys.stdout", new_callable=io.StringIO)
+    def test_streaming_with_worker_processes(self, mock_stdout: io.StringIO) -> None:
+        """Test that worker processes stream through the parent's stdout"""
+        config_data = dict(self.config_data)
+        config_data["streaming"] = {**self.config_data["streaming"], "rate_per_second": 50.0}
+        config_path = self.write_config(config_data)
+        self.addCleanup(os.unlink, config_path)
+
+        generator = DemandGenerator(config_path, workers=2)
+        generator.start_streaming()
+        self.assertEqual(len(generator._processes), 2)
+        time.sleep(0.5)
+        generator.stop_streaming()
+
+        self.assertEqual(generator._processes, [])
+        lines = mock_stdout.getvalue().splitlines()
+        self.assertGreater(len(lines), 0)
+        trip_ids = [json.loads(line)["id"] for line in lines]
+        self.assertEqual(len(trip_ids), len(set(trip_ids)))
+
     def test_start_streaming_when_already_running(self) -> None:
         """Test that starting streaming when already running has no effect"""
         self.demand_generator.start_streaming()
@@ -1,14 +1,62 @@
 import unittest
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Any
 
 from patterns.temporal_engine import (
     HourlyPattern,
     RushHourPattern,
     TemporalPatternEngine,
+    TimePattern,
     WeekdayPattern,
 )
 
+# Timestamps shared by the pattern tests, built once at import
+MONDAY_10_00 = datetime(2023, 6, 12, 10, 0, 0)  # June 12, 2023 is a Monday
+TUESDAY_10_00 = datetime(2023, 6, 13, 10, 0, 0)
+THURSDAY_02_15 = datetime(2023, 6, 15, 2, 15, 0)
+THURSDAY_06_59 = datetime(2023, 6, 15, 6, 59, 0)
+THURSDAY_08_00 = datetime(2023, 6, 15, 8, 0, 0)
+THURSDAY_08_30 = datetime(2023, 6, 15, 8, 30, 0)
+THURSDAY_09_00 = datetime(2023, 6, 15, 9, 0, 0)
+THURSDAY_12_00 = datetime(2023, 6, 15, 12, 0, 0)
+THURSDAY_17_45 = datetime(2023, 6, 15, 17, 45, 0)
+THURSDAY_18_00 = datetime(2023, 6, 15, 18, 0, 0)
+FRIDAY_10_00 = datetime(2023, 6, 16, 10, 0, 0)
+SUNDAY_10_00 = datetime(2023, 6, 18, 10, 0, 0)
+# One timestamp per hour of June 15, 2023
+THURSDAY_HOURS = tuple(datetime(2023, 6, 15, hour, 0, 0) for hour in range(24))
+# One timestamp per hour of the week starting Monday, June 12, 2023
+WEEK_HOURS = tuple(datetime(2023, 6, 12, 0, 30, 0) + timedelta(hours=h) for h in range(7 * 24))
+
+
+class HalfHourPattern(TimePattern):
+    """Pattern depending on the minute, so it cannot be precomputed"""
+
+    def get_demand_multiplier(self, timestamp: datetime) -> float:
+        return 2.0 if timestamp.minute >= 30 else 1.0
+
+
+class WeekendNightPattern(TimePattern):
+    """Cacheable pattern relying on the default slot multiplier"""
+
+    cacheable = True
+
+    def get_demand_multiplier(self, timestamp: datetime) -> float:
+        return 0.5 if timestamp.weekday() >= 5 and timestamp.hour < 6 else 1.0
+
+
+class CountingPattern(TimePattern):
+    """Cacheable pattern counting how often it is evaluated"""
+
+    cacheable = True
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def get_demand_multiplier(self, timestamp: datetime) -> float:
+        self.calls += 1
+        return 1.0
+
 
 class TestTimePatterns(unittest.TestCase):
     def test_hourly_pattern(self) -> None:
@@ -17,18 +65,12 @@ class TestTimePatterns(unittest.TestCase):
         pattern = HourlyPattern(hourly_multipliers)
 
         # Test defined hours
-        morning_time = datetime(2023, 6, 15, 8, 30, 0)
-        self.assertEqual(pattern.get_demand_multiplier(morning_time), 2.0)
-
-        evening_time = datetime(2023, 6, 15, 17, 45, 0)
-        self.assertEqual(pattern.get_demand_multiplier(evening_time), 2.5)
-
-        night_time = datetime(2023, 6, 15, 2, 15, 0)
-        self.assertEqual(pattern.get_demand_multiplier(night_time), 0.1)
+        self.assertEqual(pattern.get_demand_multiplier(THURSDAY_08_30), 2.0)
+        self.assertEqual(pattern.get_demand_multiplier(THURSDAY_17_45), 2.5)
+        self.assertEqual(pattern.get_demand_multiplier(THURSDAY_02_15), 0.1)
 
         # Test undefined hour (should default to 1.0)
-        undefined_time = datetime(2023, 6, 15, 12, 0, 0)
-        self.assertEqual(pattern.get_demand_multiplier(undefined_time), 1.0)
+        self.assertEqual(pattern.get_demand_multiplier(THURSDAY_12_00), 1.0)
 
     def test_weekday_pattern(self) -> None:
         """Test weekday demand pattern"""
@@ -36,61 +78,99 @@ class TestTimePatterns(unittest.TestCase):
         pattern = WeekdayPattern(weekday_multipliers)
 
         # Test Monday (weekday 0)
-        monday = datetime(2023, 6, 12, 10, 0, 0)  # June 12, 2023 is a Monday
-        self.assertEqual(pattern.get_demand_multiplier(monday), 1.2)
+        self.assertEqual(pattern.get_demand_multiplier(MONDAY_10_00), 1.2)
 
         # Test Friday (weekday 4)
-        friday = datetime(2023, 6, 16, 10, 0, 0)  # June 16, 2023 is a Friday
-        self.assertEqual(pattern.get_demand_multiplier(friday), 1.4)
+        self.assertEqual(pattern.get_demand_multiplier(FRIDAY_10_00), 1.4)
 
         # Test Sunday (weekday 6)
-        sunday = datetime(2023, 6, 18, 10, 0, 0)  # June 18, 2023 is a Sunday
-        self.assertEqual(pattern.get_demand_multiplier(sunday), 0.6)
+        self.assertEqual(pattern.get_demand_multiplier(SUNDAY_10_00), 0.6)
 
         # Test undefined weekday (should default to 1.0)
-        tuesday = datetime(2023, 6, 13, 10, 0, 0)  # June 13, 2023 is a Tuesday
-        self.assertEqual(pattern.get_demand_multiplier(tuesday), 1.0)
+        self.assertEqual(pattern.get_demand_multiplier(TUESDAY_10_00), 1.0)
 
     def test_rush_hour_pattern(self) -> None:
         """Test rush hour demand pattern"""
         pattern = RushHourPattern(morning_peak=(7, 9), evening_peak=(17, 19), peak_multiplier=2.5)
 
         # Test morning rush hour
-        morning_rush = datetime(2023, 6, 15, 8, 0, 0)
-        self.assertEqual(pattern.get_demand_multiplier(morning_rush), 2.5)
+        self.assertEqual(pattern.get_demand_multiplier(THURSDAY_08_00), 2.5)
 
         # Test evening rush hour
-        evening_rush = datetime(2023, 6, 15, 18, 0, 0)
-        self.assertEqual(pattern.get_demand_multiplier(evening_rush), 2.5)
+        self.assertEqual(pattern.get_demand_multiplier(THURSDAY_18_00), 2.5)
 
         # Test non-rush hour
-        midday = datetime(2023, 6, 15, 12, 0, 0)
-        self.assertEqual(pattern.get_demand_multiplier(midday), 1.0)
-
-        # Test edge cases
-        before_morning_rush = datetime(2023, 6, 15, 6, 59, 0)
-        self.assertEqual(pattern.get_demand_multiplier(before_morning_rush), 1.0)
-
-        after_morning_rush = datetime(2023, 6, 15, 9, 0, 0)
-        self.assertEqual(pattern.get_demand_multiplier(after_morning_rush), 1.0)
+        self.assertEqual(pattern.get_demand_multiplier(THURSDAY_12_00), 1.0)
+
+        # Test edge cases: just before and exactly at the end of the morning rush
+        self.assertEqual(pattern.get_demand_multiplier(THURSDAY_06_59), 1.0)
+        self.assertEqual(pattern.get_demand_multiplier(THURSDAY_09_00), 1.0)
+
+    def test_rush_hour_pattern_every_hour(self) -> None:
+        """Test rush hour pattern for every hour, including overlapping peaks"""
+        pattern = RushHourPattern(morning_peak=(6, 10), evening_peak=(9, 12), peak_multiplier=3.0)
+
+        for hour, timestamp in enumerate(THURSDAY_HOURS):
+            expected = 3.0 if 6 <= hour < 12 else 1.0
+            with self.subTest(hour=hour):
+                self.assertEqual(pattern.get_demand_multiplier(timestamp), expected)
+
+    def test_rush_hour_pattern_degenerate_peaks(self) -> None:
+        """Test unusual peak bounds match the start <= hour < end rule"""
+        peaks: list[tuple[tuple[float, float], tuple[float, float]]] = [
+            ((7, 7), (17, 19)),  # empty
+            ((9, 7), (17, 19)),  # inverted
+            ((0, 1), (22, 24)),  # end of day
+            ((5, 5), (20, 18)),  # empty and inverted
+            ((6.5, 9), (16, 18.5)),  # fractional
+            ((-3, 2), (20, 30)),  # negative start, end past midnight
+            ((-5, -1), (25, 27)),  # entirely out of range
+        ]
+
+        for morning_peak, evening_peak in peaks:
+            pattern = RushHourPattern(morning_peak, evening_peak, peak_multiplier=2.0)
+            for hour, timestamp in enumerate(THURSDAY_HOURS):
+                in_rush = any(start <= hour < end for start, end in (morning_peak, evening_peak))
+                with self.subTest(morning_peak=morning_peak, evening_peak=evening_peak, hour=hour):
+                    self.assertEqual(
+                        pattern.get_demand_multiplier(timestamp), 2.0 if in_rush else 1.0
+                    )
+
+    def test_slot_multiplier_matches_demand_multiplier(self) -> None:
+        """Test that every pattern gives the same multiplier by slot and by timestamp"""
+        patterns = [
+            HourlyPattern({8: 2.0, 17: 2.5}),
+            WeekdayPattern({0: 1.2, 6: 0.6}),
+            RushHourPattern(),
+            WeekendNightPattern(),
+        ]
+        for offset, timestamp in enumerate(WEEK_HOURS):
+            for pattern in patterns:
+                with self.subTest(pattern=type(pattern).__name__, offset=offset):
+                    self.assertEqual(
+                        pattern.get_slot_multiplier(timestamp.weekday(), timestamp.hour),
+                        pattern.get_demand_multiplier(timestamp),
+                    )
 
     def test_rush_hour_pattern_default_values(self) -> None:
         """Test rush hour pattern with default values"""
         pattern = RushHourPattern()
 
         # Default morning rush (7-9)
-        morning_rush = datetime(2023, 6, 15, 8, 0, 0)
-        self.assertEqual(pattern.get_demand_multiplier(morning_rush), 2.0)
+        self.assertEqual(pattern.get_demand_multiplier(THURSDAY_08_00), 2.0)
 
         # Default evening rush (17-19)
-        evening_rush = datetime(2023, 6, 15, 18, 0, 0)
-        self.assertEqual(pattern.get_demand_multiplier(evening_rush), 2.0)
+        self.assertEqual(pattern.get_demand_multiplier(THURSDAY_18_00), 2.0)
 
 
 class TestTemporalPatternEngine(unittest.TestCase):
-    def setUp(self) -> None:
-        """Set up test fixtures"""
-        self.config = {
+    config: dict[str, Any]
+    engine: TemporalPatternEngine
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Build the shared engine once; tests that add patterns use their own engine"""
+        cls.config = {
             "base_rate": 10.0,
             "hourly_pattern": {8: 2.0, 17: 2.5},
             "weekday_pattern": {0: 1.2, 6: 0.6},
@@ -102,7 +182,7 @@ class TestTemporalPatternEngine(unittest.TestCase):
                 "peak_multiplier": 1.5,
             },
         }
-        self.engine = TemporalPatternEngine(self.config)
+        cls.engine = TemporalPatternEngine(cls.config)
 
     def test_initialization_with_config(self) -> None:
         """Test engine initialization with provided config"""
@@ -146,22 +226,89 @@ class TestTemporalPatternEngine(unittest.TestCase):
         rate = self.engine.calculate_demand_rate(tuesday_midday)
         self.assertEqual(rate, 10.0)
 
+    def test_calculate_demand_rate_matches_patterns_every_hour(self) -> None:
+        """Test that the precomputed rates match the patterns for all 168 week hours"""
+        engine = TemporalPatternEngine(self.config)
+        engine.add_pattern(HourlyPattern({3: 0.5, 12: 3.0}))
+        monday = datetime(2023, 6, 12, 0, 45, 0)
+
+        for offset in range(7 * 24):
+            timestamp = monday + timedelta(hours=offset)
+            expected = engine.base_rate
+            for pattern in engine.patterns:
+                expected *= pattern.get_demand_multiplier(timestamp)
+            with self.subTest(weekday=timestamp.weekday(), hour=timestamp.hour):
+                self.assertAlmostEqual(engine.calculate_demand_rate(timestamp), expected)
+
     def test_add_custom_pattern(self) -> None:
         """Test adding a custom pattern to the engine"""
-        initial_pattern_count = len(self.engine.patterns)
+        engine = TemporalPatternEngine(self.config)
+        initial_pattern_count = len(engine.patterns)
 
         # Add a custom hourly pattern
         custom_pattern = HourlyPattern({12: 3.0})
-        self.engine.add_pattern(custom_pattern)
+        engine.add_pattern(custom_pattern)
 
-        self.assertEqual(len(self.engine.patterns), initial_pattern_count + 1)
+        self.assertEqual(len(engine.patterns), initial_pattern_count + 1)
 
         # Test that the new pattern affects calculations
         noon_time = datetime(2023, 6, 15, 12, 0, 0)
-        rate = self.engine.calculate_demand_rate(noon_time)
+        rate = engine.calculate_demand_rate(noon_time)
 
         # Should include the custom pattern's multiplier
-        self.assertGreater(rate, self.engine.base_rate)
+        self.assertGreater(rate, engine.base_rate)
+
+    def test_cacheable_pattern_evaluated_once_per_slot(self) -> None:
+        """Test that cacheable patterns are evaluated when added, not on every call"""
+        engine = TemporalPatternEngine(self.config)
+        pattern = CountingPattern()
+        engine.add_pattern(pattern)
+        self.assertEqual(pattern.calls, 7 * 24)
+
+        monday = datetime(2023, 6, 12, 0, 0, 0)
+        for offset in range(2 * 7 * 24):
+            engine.calculate_demand_rate(monday + timedelta(hours=offset))
+        engine.calculate_demand_rate_batch([monday] * 10)
+
+        self.assertEqual(pattern.calls, 7 * 24)
+
+    def test_add_non_cacheable_pattern(self) -> None:
+        """Test that patterns finer than an hour are evaluated on every call"""
+        engine = TemporalPatternEngine(self.config)
+        engine.add_pattern(HalfHourPattern())
+
+        tuesday_noon = datetime(2023, 6, 13, 12, 0, 0)
+        tuesday_half_past = datetime(2023, 6, 13, 12, 30, 0)
+
+        self.assertEqual(engine.calculate_demand_rate(tuesday_noon), 10.0)
+        self.assertEqual(engine.calculate_demand_rate(tuesday_half_past), 20.0)
+
+    def test_multiple_non_cacheable_patterns_multiply(self) -> None:
+        """Test that several per-call patterns combine with the precomputed rate"""
+        engine = TemporalPatternEngine(self.config)
+        engine.add_pattern(HalfHourPattern())
+        engine.add_pattern(HalfHourPattern())
+
+        # Monday 8:30: 10.0 * 2.0 * 1.2 * 1.5 from the table, times 2.0 * 2.0
+        monday_half_past_eight = datetime(2023, 6, 12, 8, 30, 0)
+        self.assertAlmostEqual(engine.calculate_demand_rate(monday_half_past_eight), 144.0)
+
+    def test_calculate_demand_rate_batch(self) -> None:
+        """Test that batch rates match the scalar calculation for a whole week"""
+        week = [datetime(2023, 6, 12, 0, 15) + timedelta(hours=h) for h in range(7 * 24)]
+
+        rates = self.engine.calculate_demand_rate_batch(week)
+
+        self.assertEqual(rates, [self.engine.calculate_demand_rate(ts) for ts in week])
+        self.assertEqual(self.engine.calculate_demand_rate_batch([]), [])
+
+    def test_calculate_demand_rate_batch_with_dynamic_pattern(self) -> None:
+        """Test that batch rates still apply patterns that are not precomputed"""
+        engine = TemporalPatternEngine(self.config)
+        engine.add_pattern(HalfHourPattern())
+        timestamps = [datetime(2023, 6, 13, 12, 0), datetime(2023, 6, 13, 12, 30)]
+
+        self.assertEqual(engine.calculate_demand_rate_batch(timestamps), [10.0, 20.0])
 
     def test_engine_with_minimal_config(self) -> None:
         """Test engine behavior with minimal configuration"""
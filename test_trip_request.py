@@ -0,0 +1,59 @@
+import json
+import unittest
+from datetime import datetime
+
+from models.trip_request import TripRequest
+
+
+class TestTripRequest(unittest.TestCase):
+    def setUp(self) -> None:
+        """Set up test fixtures"""
+        self.trip_request = TripRequest(
+            id="trip_20230615_083000_1234",
+            origin_stop_id="stop_001",
+            destination_stop_id="stop_003",
+            timestamp=datetime(2023, 6, 15, 8, 30, 0, 250000),
+            passenger_count=2,
+            trip_purpose="work",
+            priority=3,
+        )
+
+    def test_to_json_matches_json_dumps(self) -> None:
+        """Test that the serialized form is identical to json.dumps output"""
+        expected = json.dumps(
+            {
+                "id": "trip_20230615_083000_1234",
+                "origin_stop_id": "stop_001",
+                "destination_stop_id": "stop_003",
+                "timestamp": "2023-06-15T08:30:00.250000",
+                "passenger_count": 2,
+                "trip_purpose": "work",
+                "priority": 3,
+            }
+        )
+        self.assertEqual(self.trip_request.to_json(), expected)
+
+    def test_to_json_escapes_strings(self) -> None:
+        """Test that string fields are escaped"""
+        self.trip_request.origin_stop_id = 'stop "A"\\1'
+        self.trip_request.trip_purpose = "café"
+
+        parsed = json.loads(self.trip_request.to_json())
+
+        self.assertEqual(parsed["origin_stop_id"], 'stop "A"\\1')
+        self.assertEqual(parsed["trip_purpose"], "café")
+
+    def test_uses_slots(self) -> None:
+        """Test that instances carry no per-instance __dict__"""
+        self.assertFalse(hasattr(self.trip_request, "__dict__"))
+        with self.assertRaises(AttributeError):
+            self.trip_request.unknown_field = 1  # type: ignore[attr-defined]
+
+    def test_json_round_trip(self) -> None:
+        """Test that from_json restores the original request"""
+        restored = TripRequest.from_json(self.trip_request.to_json())
+        self.assertEqual(restored, self.trip_request)
+
+
+if __name__ == "__main__":
+    unittest.main()
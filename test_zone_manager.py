@@ -1,6 +1,8 @@
+import dataclasses
+import math
 import unittest
 
-from geographic.zone_manager import GeographicZone, Stop, StopRegistry
+from geographic.zone_manager import KM_PER_DEGREE, GeographicZone, Stop, StopRegistry
 
 
 class TestGeographicZone(unittest.TestCase):
@@ -38,6 +40,28 @@ class TestGeographicZone(unittest.TestCase):
         # Point far from center (should be outside 2km radius)
         self.assertFalse(self.zone.is_point_in_zone(40.8000, -74.0000))
 
+    def test_point_on_zone_boundary(self) -> None:
+        """Test points just inside and just outside the radius"""
+        radius_deg = 2.0 / KM_PER_DEGREE
+        self.assertTrue(self.zone.is_point_in_zone(40.7589 + radius_deg * 0.999, -73.9851))
+        self.assertFalse(self.zone.is_point_in_zone(40.7589 + radius_deg * 1.001, -73.9851))
+
+    def test_point_on_zone_boundary_east_west(self) -> None:
+        """Test that longitude offsets are scaled by the latitude of the zone"""
+        radius_deg = 2.0 / KM_PER_DEGREE / math.cos(math.radians(40.7589))
+        self.assertTrue(self.zone.is_point_in_zone(40.7589, -73.9851 + radius_deg * 0.999))
+        self.assertFalse(self.zone.is_point_in_zone(40.7589, -73.9851 - radius_deg * 1.001))
+
+    def test_bounding_box_encloses_zone(self) -> None:
+        """Test that the bounding box touches the zone at its extreme points"""
+        min_lat, min_lon, max_lat, max_lon = self.zone.bounding_box()
+
+        self.assertTrue(self.zone.is_point_in_zone(min_lat + 1e-9, -73.9851))
+        self.assertTrue(self.zone.is_point_in_zone(max_lat - 1e-9, -73.9851))
+        self.assertTrue(self.zone.is_point_in_zone(40.7589, min_lon + 1e-9))
+        self.assertTrue(self.zone.is_point_in_zone(40.7589, max_lon - 1e-9))
+        self.assertFalse(self.zone.is_point_in_zone(40.7589, max_lon + 1e-6))
+
     def test_zone_default_demand_weight(self) -> None:
         """Test zone with default demand weight"""
         zone = GeographicZone(
@@ -49,6 +73,15 @@ class TestGeographicZone(unittest.TestCase):
         )
         self.assertEqual(zone.demand_weight, 1.0)
 
+    def test_zone_is_slotted_and_hashable(self) -> None:
+        """Test that zones carry no instance dict and can be used as dict keys"""
+        same_zone = GeographicZone("test_zone", "Test Zone", 40.7589, -73.9851, 2.0, 1.5)
+
+        self.assertFalse(hasattr(self.zone, "__dict__"))
+        self.assertEqual({self.zone: "a"}[same_zone], "a")
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            self.zone.radius_km = 3.0  # type: ignore[misc]
+
 
 class TestStop(unittest.TestCase):
     def test_stop_initialization(self) -> None:
@@ -80,6 +113,14 @@ class TestStop(unittest.TestCase):
         )
         self.assertEqual(stop.stop_type, "bus")
 
+    def test_stop_is_slotted_and_hashable(self) -> None:
+        """Test that stops carry no instance dict and can be used as set members"""
+        stop = Stop("stop_001", "Main Street Station", 40.7589, -73.9851, "downtown")
+        same_stop = Stop("stop_001", "Main Street Station", 40.7589, -73.9851, "downtown")
+
+        self.assertFalse(hasattr(stop, "__dict__"))
+        self.assertEqual(len({stop, same_stop}), 1)
+
 
 class TestStopRegistry(unittest.TestCase):
     def setUp(self) -> None:
@@ -102,6 +143,27 @@ class TestStopRegistry(unittest.TestCase):
         stop_ids = [stop.id for stop in self.registry.stops]
         self.assertIn("stop_001", stop_ids)
 
+    def test_registries_share_default_data_safely(self) -> None:
+        """Test that registries share default stops but not their lists"""
+        other = StopRegistry()
+        new_stop = Stop("test_stop", "Test Stop", 40.7000, -74.0000, "test_zone")
+
+        self.registry.add_stop(new_stop)
+
+        self.assertIs(other.stops[0], self.registry.stops[0])
+        self.assertNotIn(new_stop, other.stops)
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            self.registry.stops[0].lat = 0.0  # type: ignore[misc]
+
+    def test_default_data_built_once(self) -> None:
+        """Test that new registries reuse the default zones and stops instead of rebuilding them"""
+        other = StopRegistry()
+
+        for zone, other_zone in zip(self.registry.zones, other.zones, strict=True):
+            self.assertIs(zone, other_zone)
+        for stop, other_stop in zip(self.registry.stops, other.stops, strict=True):
+            self.assertIs(stop, other_stop)
+
     def test_get_random_stop(self) -> None:
         """Test getting a random stop"""
         stop = self.registry.get_random_stop()
@@ -122,12 +184,38 @@ class TestStopRegistry(unittest.TestCase):
         # This is probabilistic, so we just check it appears
         self.assertIn("downtown", zone_counts)
 
+    def test_get_random_stops(self) -> None:
+        """Test drawing a batch of random stops"""
+        stops = self.registry.get_random_stops(500)
+
+        self.assertEqual(len(stops), 500)
+        for stop in stops:
+            self.assertIn(stop, self.registry.stops)
+        # Downtown carries the highest zone weight
+        self.assertIn("downtown", {stop.zone_id for stop in stops})
+        self.assertEqual(self.registry.get_random_stops(0), [])
+
+    def test_alias_table_matches_stop_weights(self) -> None:
+        """Test that the alias table gives each stop its share of the zone weights"""
+        weights = self.registry.get_stop_weights()
+        prob, alias = StopRegistry._build_alias_table(weights)
+
+        # Each slot is picked with probability 1/n, then kept or redirected to its alias
+        shares = [0.0] * len(weights)
+        for index, keep in enumerate(prob):
+            shares[index] += keep / len(weights)
+            shares[alias[index]] += (1.0 - keep) / len(weights)
+
+        total = sum(weights)
+        for share, weight in zip(shares, weights, strict=True):
+            self.assertAlmostEqual(share, weight / total)
+
     def test_get_stops_in_zone(self) -> None:
         """Test getting stops in a specific zone"""
         downtown_stops = self.registry.get_stops_in_zone("downtown")
 
-        # Should return a list
-        self.assertIsInstance(downtown_stops, list)
+        # Should return an immutable tuple
+        self.assertIsInstance(downtown_stops, tuple)
 
         # All stops should be in downtown zone
         for stop in downtown_stops:
@@ -136,7 +224,7 @@ class TestStopRegistry(unittest.TestCase):
     def test_get_stops_in_nonexistent_zone(self) -> None:
         """Test getting stops from a zone that doesn't exist"""
         stops = self.registry.get_stops_in_zone("nonexistent_zone")
-        self.assertEqual(stops, [])
+        self.assertEqual(stops, ())
 
     def test_add_stop(self) -> None:
         """Test adding a new stop"""
@@ -155,6 +243,53 @@ class TestStopRegistry(unittest.TestCase):
         self.assertEqual(len(self.registry.stops), initial_count + 1)
         self.assertIn(new_stop, self.registry.stops)
 
+    def test_add_stop_updates_lookups(self) -> None:
+        """Test that an added stop is visible to zone lookup and sampling"""
+        new_stop = Stop(
+            id="test_stop",
+            name="Test Stop",
+            lat=40.7000,
+            lon=-74.0000,
+            zone_id="test_zone",
+        )
+
+        self.registry.add_stop(new_stop)
+
+        self.assertEqual(self.registry.get_stops_in_zone("test_zone"), (new_stop,))
+        sampled = {self.registry.get_random_stop().id for _ in range(500)}
+        self.assertIn("test_stop", sampled)
+
+    def test_add_stop_to_existing_zone(self) -> None:
+        """Test that a stop added to a known zone follows the zone's existing stops"""
+        downtown_stops = self.registry.get_stops_in_zone("downtown")
+        new_stop = Stop("test_stop", "Test Stop", 40.7600, -73.9800, "downtown")
+
+        self.registry.add_stop(new_stop)
+
+        self.assertEqual(self.registry.get_stops_in_zone("downtown"), (*downtown_stops, new_stop))
+        # Previously returned tuples are unaffected
+        self.assertNotIn(new_stop, downtown_stops)
+
+    def test_version_bumps_on_change(self) -> None:
+        """Test that adding stops or zones bumps the registry version"""
+        version = self.registry.version
+        self.registry.add_stop(
+            Stop(id="test_stop", name="Test Stop", lat=40.7, lon=-74.0, zone_id="test_zone")
+        )
+        self.assertGreater(self.registry.version, version)
+
+        version = self.registry.version
+        self.registry.add_zone(
+            GeographicZone(
+                id="test_zone",
+                name="Test Zone",
+                center_lat=40.7,
+                center_lon=-74.0,
+                radius_km=1.0,
+            )
+        )
+        self.assertGreater(self.registry.version, version)
+
     def test_add_zone(self) -> None:
         """Test adding a new zone"""
         initial_count = len(self.registry.zones)
@@ -173,6 +308,121 @@ class TestStopRegistry(unittest.TestCase):
         self.assertEqual(len(self.registry.zones), initial_count + 1)
         self.assertIn(new_zone, self.registry.zones)
 
+    def test_find_zones_containing(self) -> None:
+        """Test finding every zone that contains a point"""
+        # Downtown and midtown overlap around their shared edge
+        zones = self.registry.find_zones_containing(40.7547, -73.9892)
+        self.assertEqual([zone.id for zone in zones], ["downtown", "midtown"])
+
+        zones = self.registry.find_zones_containing(40.7282, -73.7949)
+        self.assertEqual([zone.id for zone in zones], ["suburbs"])
+
+        self.assertEqual(self.registry.find_zones_containing(0.0, 0.0), [])
+
+    def test_find_zones_containing_added_zone(self) -> None:
+        """Test that added zones are found by point lookup"""
+        new_zone = GeographicZone("test_zone", "Test Zone", 41.0, -74.5, 1.0)
+
+        self.registry.add_zone(new_zone)
+
+        self.assertEqual(self.registry.find_zones_containing(41.001, -74.501), [new_zone])
+
+    def test_stops_within(self) -> None:
+        """Test finding stops within a radius of a point"""
+        # stop_005 is about 0.7 km from stop_001, stop_006 about 0.95 km
+        nearby = self.registry.stops_within(40.7589, -73.9851, 0.8)
+        self.assertEqual([stop.id for stop in nearby], ["stop_001", "stop_005"])
+
+        nearby = self.registry.stops_within(40.7589, -73.9851, 0.1)
+        self.assertEqual([stop.id for stop in nearby], ["stop_001"])
+
+        self.assertEqual(self.registry.stops_within(0.0, 0.0, 5.0), [])
+
+    def test_stops_within_matches_full_scan(self) -> None:
+        """Test that the banded search finds the same stops as checking every stop"""
+        lat, lon = 40.7500, -73.9500
+        for radius_km in (0.5, 2.0, 5.0, 20.0):
+            probe = GeographicZone("probe", "Probe", lat, lon, radius_km)
+            expected = {
+                stop.id
+                for stop in self.registry.stops
+                if probe.is_point_in_zone(stop.lat, stop.lon)
+            }
+            with self.subTest(radius_km=radius_km):
+                found = {stop.id for stop in self.registry.stops_within(lat, lon, radius_km)}
+                self.assertEqual(found, expected)
+
+    def test_stops_within_added_stops_in_one_band(self) -> None:
+        """Test radius search over stops added to one band out of longitude order"""
+        new_stops = [
+            Stop(f"test_stop_{offset}", "Test Stop", 41.0, -74.5 + offset * 0.002, "test_zone")
+            for offset in (3, -2, 0, 1, -3)
+        ]
+        for stop in new_stops:
+            self.registry.add_stop(stop)
+
+        # Stops 0.002 deg of longitude apart are about 0.17 km apart at this latitude
+        nearby = self.registry.stops_within(41.0, -74.5, 0.2)
+
+        self.assertEqual([stop.id for stop in nearby], ["test_stop_0", "test_stop_1"])
+
+    def test_nearest_stop(self) -> None:
+        """Test finding the stop closest to a point"""
+        stops_by_id = {stop.id: stop for stop in self.registry.stops}
+
+        nearest = self.registry.nearest_stop(40.7610, -73.9780)
+        self.assertEqual(nearest, stops_by_id["stop_005"])
+
+        # Far from every band still finds the closest stop
+        nearest = self.registry.nearest_stop(40.0, -73.0)
+        self.assertEqual(nearest, stops_by_id["stop_004"])
+
+    def test_nearest_stop_matches_full_scan(self) -> None:
+        """Test that the banded nearest-stop search agrees with checking every stop"""
+        points = [
+            (40.7589, -73.9851),
+            (40.75, -73.90),
+            (40.79, -74.10),
+            (40.70, -73.80),
+            # Far from every stop, across thousands of empty bands
+            (-60.0, -73.9),
+            (80.0, 10.0),
+        ]
+        for lat, lon in points:
+            lon_scale = math.cos(math.radians(lat))
+            expected = min(
+                self.registry.stops,
+                key=lambda stop: (stop.lat - lat) ** 2 + ((stop.lon - lon) * lon_scale) ** 2,
+            )
+            with self.subTest(lat=lat, lon=lon):
+                self.assertEqual(self.registry.nearest_stop(lat, lon), expected)
+
+    def test_nearest_stop_empty_registry(self) -> None:
+        """Test that a registry without stops has no nearest stop"""
+        self.registry.stops = []
+        self.registry._rebuild_indexes()
+
+        self.assertIsNone(self.registry.nearest_stop(40.7589, -73.9851))
+
+    def test_stop_indexes_within(self) -> None:
+        """Test that radius search by index returns sorted positions in stops"""
+        # stop_001, stop_005 and stop_006 are within 1 km of the downtown center
+        indexes = self.registry.stop_indexes_within(40.7589, -73.9851, 1.0)
+
+        self.assertEqual(indexes, [0, 4, 5])
+        self.assertEqual(
+            [self.registry.stops[index] for index in indexes],
+            self.registry.stops_within(40.7589, -73.9851, 1.0),
+        )
+
+    def test_stops_within_added_stop(self) -> None:
+        """Test that added stops are found by radius search"""
+        new_stop = Stop("test_stop", "Test Stop", 41.0, -74.5, "test_zone")
+
+        self.registry.add_stop(new_stop)
+
+        self.assertEqual(self.registry.stops_within(41.0, -74.5, 0.5), [new_stop])
+
     def test_stops_have_valid_zones(self) -> None:
         """Test that all default stops reference valid zones"""
         zone_ids = {zone.id for zone in self.registry.zones}